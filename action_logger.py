@@ -1,29 +1,128 @@
+import atexit
+import gzip
+import itertools
 import json
-from datetime import datetime
+import os
+import queue
+import threading
+import time
+from collections import deque
 from typing import Optional, Dict, Any
 
+# Number of recent actions kept in memory, overridable via LLM_LOG_RECENT
+DEFAULT_MAX_RECENT = 1024
+
+# Buffer size for the log file handle; batches are flushed explicitly
+LOG_BUFFER_SIZE = 64 * 1024
+
+# Maximum records waiting for the writer; further records are dropped
+LOG_QUEUE_SIZE = 4096
+
+# Seconds to wait on the writer when enqueuing a control marker or stopping it
+CONTROL_PUT_TIMEOUT = 1.0
+
+# Compression level for .gz logs; level 1 keeps CPU cost negligible
+GZIP_COMPRESSLEVEL = 1
+
+# Queue markers handled by the writer thread
+_STOP = object()
+_CLEAR = object()
+
+# (second, formatted "YYYY-MM-DDTHH:MM:SS") for the most recent timestamp
+_timestamp_cache = (None, "")
+
+def _format_timestamp(t: float) -> str:
+    """Format t as a local ISO 8601 timestamp with millisecond precision."""
+    global _timestamp_cache
+    # Round to microseconds first, as datetime does, so float error in t
+    # cannot push the milliseconds down by one
+    second = int(t)
+    micros = round((t - second) * 1_000_000)
+    if micros >= 1_000_000:
+        second, micros = second + 1, micros - 1_000_000
+    cached_second, prefix = _timestamp_cache
+    if second != cached_second:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(second))
+        _timestamp_cache = (second, prefix)
+    return f"{prefix}.{micros // 1000:03d}"
+
+def _max_recent_from_env() -> int:
+    """Read LLM_LOG_RECENT, falling back to the default when unset or invalid."""
+    try:
+        return max(int(os.environ.get("LLM_LOG_RECENT", DEFAULT_MAX_RECENT)), 0)
+    except ValueError:
+        return DEFAULT_MAX_RECENT
+
 class ActionLogger:
-    def __init__(self, log_file: str = "llm_actions.json"):
+    def __init__(self, log_file: str = "llm_actions.jsonl", max_recent: Optional[int] = None,
+                 flush_interval: float = 0.1):
         self.log_file = log_file
-        self.actions = self._load_actions()
+        self.flush_interval = flush_interval
+        if max_recent is None:
+            max_recent = _max_recent_from_env()
+        self.actions: deque = deque(maxlen=max_recent)  # ring buffer of recent actions
+        self._queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        self.dropped = 0  # records discarded: queue full, or still queued when close() gave up
+        self.failed = 0  # records the writer could not encode or write
+        self._fh = self._open_log('a')
+        self._writer = threading.Thread(target=self._writer_loop, name="ActionLogger", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
 
-    def _load_actions(self) -> list:
-        try:
-            with open(self.log_file, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
+    def _open_log(self, mode: str):
+        """Open the log file for text writing, gzip-compressed if it ends in .gz."""
+        if self.log_file.endswith(".gz"):
+            # GzipFile.flush() emits a sync flush; if the process dies, data up to the
+            # last flush can be recovered, though the stream lacks its end marker
+            return gzip.open(self.log_file, mode + 't', compresslevel=GZIP_COMPRESSLEVEL, encoding="utf-8")
+        return open(self.log_file, mode, buffering=LOG_BUFFER_SIZE, encoding="utf-8")
 
-    def _save_actions(self):
-        with open(self.log_file, 'w') as f:
-            json.dump(self.actions, f, indent=2)
+    def _writer_loop(self):
+        """Drain queued actions and append them to the log file in batches."""
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
 
-    def log_action(self, action_type: str, command: str, status: str = "success", 
+            # Errors are counted rather than raised so the writer keeps running
+            for item in batch:
+                try:
+                    if item is _STOP:
+                        running = False
+                    elif item is _CLEAR:
+                        # Reopen in write mode; gzip streams cannot be truncated in place
+                        self._fh.close()
+                        self._fh = self._open_log('w')
+                    else:
+                        self._fh.write(json.dumps(item, separators=(",", ":"), default=str) + "\n")
+                except (TypeError, ValueError, OSError):
+                    self.failed += 1
+            try:
+                self._fh.flush()
+            except (ValueError, OSError):
+                self.failed += 1
+            for _ in batch:
+                self._queue.task_done()
+
+            if running:
+                time.sleep(self.flush_interval)
+
+        # Stopped: the handle is ours to close even if close() stopped waiting
+        try:
+            self._fh.close()
+        except (ValueError, OSError):
+            self.failed += 1
+
+    def log_action(self, action_type: str, command: str, status: str = "success",
                   reasoning: Optional[str] = None, prompt: Optional[str] = None,
                   output: Optional[str] = None, error: Optional[str] = None,
                   context: Optional[Dict[str, Any]] = None, **kwargs):
         action = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": _format_timestamp(time.time()),
             "action_type": action_type,
             "command": command,
             "status": status
@@ -39,17 +138,57 @@ class ActionLogger:
             action["error"] = error
         if context:
             action["context"] = context
-        
+
         # Add any additional fields
         for key, value in kwargs.items():
             action[key] = value
 
         self.actions.append(action)
-        self._save_actions()
+        try:
+            self._queue.put_nowait(action)
+        except queue.Full:
+            self.dropped += 1
 
     def get_recent_actions(self, limit: int = 10) -> list:
-        return self.actions[-limit:]
+        return list(itertools.islice(reversed(self.actions), max(limit, 0)))[::-1]
+
+    def clear_logs(self) -> bool:
+        """Clear recent actions and truncate the log file.
+
+        Returns False, leaving both untouched, if the request could not be
+        handed to a stalled writer or the logger is already closed.
+        """
+        if not self._writer.is_alive():
+            # No writer to race with, so truncate directly unless already closed
+            if self._fh.closed:
+                return False
+            self._fh.close()
+            self._fh = self._open_log('w')
+        else:
+            try:
+                self._queue.put(_CLEAR, timeout=CONTROL_PUT_TIMEOUT)
+            except queue.Full:
+                return False
+        self.actions.clear()
+        return True
+
+    def flush(self):
+        """Block until every queued action has been written and flushed."""
+        if self._writer.is_alive():
+            self._queue.join()
 
-    def clear_logs(self):
-        self.actions = []
-        self._save_actions() 
\ No newline at end of file
+    def close(self):
+        """Write out any queued actions and close the log file."""
+        if self._writer.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=CONTROL_PUT_TIMEOUT)
+            except queue.Full:
+                pass
+            self._writer.join(CONTROL_PUT_TIMEOUT)
+            if self._writer.is_alive():
+                # The writer is stalled: leave the handle to it rather than close it
+                # underneath a write, and count what it has not written yet
+                self.dropped += self._queue.qsize()
+                return
+        if not self._fh.closed:
+            self._fh.close()
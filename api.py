@@ -1,12 +1,56 @@
 from fastapi import FastAPI, HTTPException
-import subprocess
+from fastapi.responses import ORJSONResponse, StreamingResponse
+import asyncio
+import orjson
+import os
+import signal
 from pydantic import BaseModel
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
+
+# Seconds a command may run before it is killed
+COMMAND_TIMEOUT = 10
+# Bytes of output returned by /run; use /run_stream for larger outputs
+MAX_OUTPUT = 1 << 20
+TRUNCATED_MARKER = b"\n[output truncated]\n"
+READ_CHUNK_SIZE = 64 * 1024
 
 class CommandRequest(BaseModel):
     command: str
 
+async def _spawn(command: str) -> asyncio.subprocess.Process:
+    # Run the command in a child process without blocking the event loop
+    return await asyncio.create_subprocess_exec(
+        "/bin/bash", "-c", command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        start_new_session=True  # own process group, so _kill reaches grandchildren
+    )
+
+async def _kill(proc: asyncio.subprocess.Process) -> None:
+    """Kill the command's whole process group and reap it."""
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    await proc.wait()
+
+async def _read_output(proc: asyncio.subprocess.Process, limit: int) -> bytes:
+    """Read the child's output until exit, keeping at most limit bytes."""
+    chunks = []
+    size = 0
+    while True:
+        chunk = await proc.stdout.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        if size < limit:
+            chunks.append(chunk[:limit - size])
+        size += len(chunk)
+    await proc.wait()
+    if size > limit:
+        chunks.append(TRUNCATED_MARKER)
+    return b"".join(chunks)
+
 @app.get("/")
 def root():
     return {"status": "sandbox ready"}
@@ -14,13 +58,53 @@ def root():
 @app.post("/run")
 async def run_bash(command_request: CommandRequest):
     try:
-        # Run the command securely and return the output
-        output = subprocess.check_output(command_request.command, shell=True, stderr=subprocess.STDOUT, timeout=10, executable="/bin/bash")
-        return {"output": output.decode()}
-    except subprocess.CalledProcessError as e:
-        error_msg = e.output.decode()
-        raise HTTPException(status_code=400, detail=error_msg)
-    except subprocess.TimeoutExpired:
-        raise HTTPException(status_code=408, detail="command timeout")
+        proc = await _spawn(command_request.command)
+        try:
+            output = await asyncio.wait_for(_read_output(proc, MAX_OUTPUT), timeout=COMMAND_TIMEOUT)
+        except asyncio.TimeoutError:
+            await _kill(proc)
+            raise HTTPException(status_code=408, detail="command timeout")
+
+        if proc.returncode != 0:
+            raise HTTPException(status_code=400, detail=output.decode(errors="replace"))
+        return {"output": output.decode(errors="replace")}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/run_stream")
+async def run_bash_stream(command_request: CommandRequest):
+    """Stream the command's output as it is produced.
+
+    The body ends with a newline and a JSON line holding either the
+    returncode or an error.
+    """
+    try:
+        proc = await _spawn(command_request.command)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def stream_output():
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + COMMAND_TIMEOUT
+        finished = False
+        try:
+            while True:
+                chunk = await asyncio.wait_for(proc.stdout.read(READ_CHUNK_SIZE),
+                                               timeout=max(0, deadline - loop.time()))
+                if not chunk:
+                    break
+                yield chunk
+            returncode = await asyncio.wait_for(proc.wait(), timeout=max(0, deadline - loop.time()))
+            finished = True
+            yield b"\n" + orjson.dumps({"returncode": returncode}) + b"\n"
+        except asyncio.TimeoutError:
+            yield b"\n" + orjson.dumps({"error": "command timeout"}) + b"\n"
+        finally:
+            # Also reached when the client disconnects mid-stream; bash may have
+            # exited while a grandchild still holds the pipe, so kill the group
+            if not finished:
+                await _kill(proc)
+
+    return StreamingResponse(stream_output(), media_type="text/plain")
@@ -3,9 +3,21 @@ import json
 from typing import Dict, Any, Optional
 import asyncio
 from enum import Enum
+import random
+import re
 import time
+import uuid
 from action_logger import ActionLogger
 
+# Example dangerous commands, matched case-insensitively in a single pass
+DANGEROUS_COMMAND_PATTERNS = [
+    r"rm\s+-rf",
+    r"mkfs",
+    r"(?<![a-z])dd(?![a-z])",
+    re.escape(":(){ :|:& };:"),
+]
+_DANGEROUS_RE = re.compile("|".join(DANGEROUS_COMMAND_PATTERNS), re.IGNORECASE)
+
 class ErrorType(Enum):
     TIMEOUT = "timeout"
     NETWORK = "network"
@@ -22,15 +34,39 @@ class MCPError(Exception):
         super().__init__(self.message)
 
 class MCPClient:
-    def __init__(self, server_url: str = "http://localhost:8001", timeout: float = 30.0, max_retries: int = 3):
+    def __init__(self, server_url: str = "http://localhost:8001", timeout: float = 30.0, max_retries: int = 3,
+                 command_cooldown: float = 0.1, max_concurrency: int = 8):
         self.server_url = server_url
         self.timeout = timeout
         self.max_retries = max_retries
-        self.context: Dict[str, Any] = {}
-        self.last_command_time: float = 0
-        self.command_cooldown: float = 0.1  # 100ms between commands
+        self.session_id = uuid.uuid4().hex  # server keeps the accumulated context per session
+        self.last_command_time: float = float("-inf")  # event loop (monotonic) clock
+        self.command_cooldown: float = command_cooldown  # 100ms between commands by default
+        self._semaphore = asyncio.Semaphore(max_concurrency)  # bounds commands in flight
         self.logger = ActionLogger()
-        
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared HTTP client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=60)
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP client and release pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self) -> "MCPClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
     def _validate_command(self, command: str) -> None:
         """Validate the command before sending it to the server."""
         if not command or not isinstance(command, str):
@@ -41,24 +77,38 @@ class MCPClient:
             )
         
         # Add more validation rules as needed
-        dangerous_commands = ["rm -rf", "mkfs", "dd", ":(){ :|:& };:"]  # Example dangerous commands
-        if any(dc in command.lower() for dc in dangerous_commands):
+        if _DANGEROUS_RE.search(command):
             raise MCPError(
                 ErrorType.VALIDATION,
                 "Potentially dangerous command detected",
                 {"command": command}
             )
     
-    def _check_command_cooldown(self) -> None:
-        """Ensure commands aren't sent too frequently."""
-        current_time = time.time()
-        time_since_last = current_time - self.last_command_time
-        if time_since_last < self.command_cooldown:
-            time.sleep(self.command_cooldown - time_since_last)
-        self.last_command_time = time.time()
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        """Exponential backoff with jitter for the given zero-based retry attempt."""
+        return min(30.0, 0.25 * (2 ** attempt)) * (0.5 + random.random() * 0.5)
+
+    async def _check_command_cooldown(self) -> None:
+        """Ensure commands aren't sent too frequently without blocking the event loop."""
+        # Claim the next send slot before sleeping so concurrent callers are spaced out
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self.last_command_time + self.command_cooldown)
+        self.last_command_time = slot
+        if slot > now:
+            await asyncio.sleep(slot - now)
         
-    async def execute_command(self, command: str, purpose: Optional[str] = None) -> Dict[str, Any]:
-        """Execute a command through the MCP server with enhanced error handling."""
+    async def execute_command(self, command: str, purpose: Optional[str] = None,
+                              session_id: Optional[str] = None) -> Dict[str, Any]:
+        """Execute a command through the MCP server with enhanced error handling.
+
+        session_id defaults to the client's own; callers multiplexing several
+        users over one client pass a per-user id.
+        """
+        async with self._semaphore:
+            return await self._execute_command(command, purpose, session_id or self.session_id)
+
+    async def _execute_command(self, command: str, purpose: Optional[str], session_id: str) -> Dict[str, Any]:
         try:
             # Log the start of command execution
             self.logger.log_action(
@@ -72,91 +122,87 @@ class MCPClient:
             self._validate_command(command)
             
             # Check command cooldown
-            self._check_command_cooldown()
+            await self._check_command_cooldown()
             
             # Prepare the request payload
             payload = {
                 "command": command,
                 "context": {
                     "purpose": purpose,
-                    "previous_context": self.context,
+                    "session_id": session_id,
                     "timestamp": time.time()
                 }
             }
             
-            # Retry logic
+            # Retry logic; every attempt reuses the same pooled client
+            client = await self._get_client()
             for attempt in range(self.max_retries):
                 try:
-                    async with httpx.AsyncClient() as client:
-                        response = await client.post(
-                            f"{self.server_url}/execute",
-                            json=payload,
-                            timeout=self.timeout
+                    response = await client.post(
+                        f"{self.server_url}/execute",
+                        json=payload,
+                        timeout=self.timeout
+                    )
+                    
+                    if response.status_code == 503:
+                        error_msg = "Server is temporarily unavailable"
+                        self.logger.log_action(
+                            action_type="command_execution_error",
+                            command=command,
+                            status="error",
+                            error=error_msg,
+                            details={"status_code": response.status_code}
                         )
-                        
-                        if response.status_code == 503:
-                            error_msg = "Server is temporarily unavailable"
-                            self.logger.log_action(
-                                action_type="command_execution_error",
-                                command=command,
-                                status="error",
-                                error=error_msg,
-                                details={"status_code": response.status_code}
-                            )
-                            raise MCPError(
-                                ErrorType.SERVER,
-                                error_msg,
-                                {"status_code": response.status_code}
-                            )
-                        
-                        if response.status_code != 200:
-                            error_msg = f"Server error: {response.status_code}"
-                            self.logger.log_action(
-                                action_type="command_execution_error",
-                                command=command,
-                                status="error",
-                                error=error_msg,
-                                details={"response": response.text}
-                            )
-                            return {
-                                "error": error_msg,
-                                "error_type": ErrorType.SERVER.value,
-                                "details": response.text
-                            }
-                        
-                        result = response.json()
-                        
-                        # Validate response format
-                        if not isinstance(result, dict):
-                            error_msg = "Invalid response format from server"
-                            self.logger.log_action(
-                                action_type="command_execution_error",
-                                command=command,
-                                status="error",
-                                error=error_msg,
-                                details={"response": result}
-                            )
-                            raise MCPError(
-                                ErrorType.VALIDATION,
-                                error_msg,
-                                {"response": result}
-                            )
-                        
-                        # Update context with the response
-                        if "context" in result:
-                            self.context.update(result["context"])
-                        
-                        # Log successful execution
+                        raise MCPError(
+                            ErrorType.SERVER,
+                            error_msg,
+                            {"status_code": response.status_code}
+                        )
+                    
+                    if response.status_code != 200:
+                        error_msg = f"Server error: {response.status_code}"
                         self.logger.log_action(
-                            action_type="command_execution_success",
+                            action_type="command_execution_error",
+                            command=command,
+                            status="error",
+                            error=error_msg,
+                            details={"response": response.text}
+                        )
+                        return {
+                            "error": error_msg,
+                            "error_type": ErrorType.SERVER.value,
+                            "details": response.text
+                        }
+                    
+                    result = response.json()
+                    
+                    # Validate response format
+                    if not isinstance(result, dict):
+                        error_msg = "Invalid response format from server"
+                        self.logger.log_action(
+                            action_type="command_execution_error",
                             command=command,
-                            status="success",
-                            output=result.get("output"),
-                            details={"context": result.get("context", {})}
+                            status="error",
+                            error=error_msg,
+                            details={"response": result}
                         )
-                        
-                        return result
-                        
+                        raise MCPError(
+                            ErrorType.VALIDATION,
+                            error_msg,
+                            {"response": result}
+                        )
+                    
+                    # Log successful execution
+                    self.logger.log_action(
+                        action_type="command_execution_success",
+                        command=command,
+                        status="success",
+                        output=result.get("output"),
+                        details={"context": result.get("context", {})}
+                    )
+                    
+                    return result
+                    
                 except httpx.TimeoutException:
                     if attempt == self.max_retries - 1:
                         error_msg = f"Command timed out after {self.timeout} seconds"
@@ -172,7 +218,7 @@ class MCPClient:
                             error_msg,
                             {"command": command, "attempt": attempt + 1}
                         )
-                    await asyncio.sleep(1 * (attempt + 1))  # Exponential backoff
+                    await asyncio.sleep(self._backoff(attempt))
                     
                 except httpx.RequestError as e:
                     if attempt == self.max_retries - 1:
@@ -189,7 +235,7 @@ class MCPClient:
                             error_msg,
                             {"command": command, "attempt": attempt + 1}
                         )
-                    await asyncio.sleep(1 * (attempt + 1))
+                    await asyncio.sleep(self._backoff(attempt))
                 
         except MCPError as e:
             self.logger.log_action(
@@ -220,9 +266,6 @@ class MCPClient:
             }
 
 async def main():
-    # Create MCP client
-    client = MCPClient()
-    
     # Test scenarios
     test_scenarios = [
         # Normal commands
@@ -236,15 +279,22 @@ async def main():
         ("rm -rf /", "Test dangerous command"),
     ]
     
-    # Execute test scenarios
-    for command, purpose in test_scenarios:
+    # Run all scenarios concurrently over one connection pool; the cooldown
+    # would otherwise serialize them, so concurrency is bounded instead
+    async with MCPClient(command_cooldown=0.0) as client:
+        results = await asyncio.gather(
+            *(client.execute_command(command, purpose) for command, purpose in test_scenarios),
+            return_exceptions=True
+        )
+    
+    for (command, purpose), result in zip(test_scenarios, results):
         print(f"\n{'='*50}")
         print(f"Executing command: {command}")
         print(f"Purpose: {purpose}")
         
-        result = await client.execute_command(command, purpose)
-        
-        if "error" in result:
+        if isinstance(result, BaseException):
+            print(f"Error: {result!r}")
+        elif "error" in result:
             print(f"Error Type: {result.get('error_type', 'unknown')}")
             print(f"Error: {result['error']}")
             if "details" in result:
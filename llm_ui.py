@@ -1,15 +1,52 @@
 from fastapi import FastAPI, Request, WebSocket
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 import httpx
-import json
-from typing import Dict, Any
+import logging
+import orjson
+from typing import Dict, Any, Final, Optional
 import asyncio
+from contextlib import asynccontextmanager
 from pathlib import Path
 import urllib.parse
+import uuid
+from llm_client import MCPClient
 
-app = FastAPI(title="LLM Command Interface")
+# MCP Client configuration
+MCP_SERVER_URL = "http://localhost:8002"  # Updated to point to MCP server
+LLM_API_URL = "http://localhost:11434/api/generate"  # Default Ollama API endpoint
+
+# Ollama request skeleton and prompt; only the user request varies per call
+_PAYLOAD_MODEL: Final[Dict[str, Any]] = {"model": "qwen3:0.6b", "stream": False}
+_PROMPT_TEMPLATE: Final[str] = """You are a command generator. Your task is to convert user requests into bash commands.
+
+IMPORTANT: Respond with ONLY a JSON object. No other text, no thoughts, no explanations.
+The response must be a valid JSON object with exactly these fields:
+- command: the bash command to execute
+- explanation: a brief explanation of what the command does
+
+Example response:
+{{"command": "ls -la", "explanation": "Lists all files including hidden ones with detailed information"}}
+
+User request: {prompt}
+
+Response:"""
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create clients on the running event loop so their connection pools bind to it
+    app.state.llm_client = LLMClient()
+    app.state.mcp_client = MCPClient(server_url=MCP_SERVER_URL)
+    try:
+        yield
+    finally:
+        await app.state.llm_client.aclose()
+        await app.state.mcp_client.aclose()
+
+app = FastAPI(title="LLM Command Interface", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Create templates directory
 templates_dir = Path("templates")
@@ -25,163 +62,138 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 # Templates
 templates = Jinja2Templates(directory="templates")
 
-# MCP Client configuration
-MCP_SERVER_URL = "http://localhost:8002"  # Updated to point to MCP server
-LLM_API_URL = "http://localhost:11434/api/generate"  # Default Ollama API endpoint
+def _extract_json_object(text: str) -> Optional[str]:
+    """Return the last {...} span in text, or None if there is none.
+
+    Braces inside strings (e.g. awk '{print $1}') and nested objects mean the
+    nearest '{' is not always the object's start, so earlier candidates are
+    tried until one parses; the nearest span is returned if none do.
+    """
+    json_end = text.rfind('}')
+    if json_end < 0:
+        return None
+    json_start = text.rfind('{', 0, json_end)
+    if json_start < 0:
+        return None
+    start = json_start
+    while start >= 0:
+        candidate = text[start:json_end + 1]
+        try:
+            orjson.loads(candidate)
+            return candidate
+        except orjson.JSONDecodeError:
+            start = text.rfind('{', 0, start)
+    return text[json_start:json_end + 1]
 
 class LLMClient:
-    def __init__(self, api_url: str = LLM_API_URL):
+    def __init__(self, api_url: str = LLM_API_URL, timeout: float = 30.0):
         self.api_url = api_url
-        
-    async def generate_command(self, prompt: str) -> Dict[str, Any]:
-        """Generate a command based on the user's prompt using the local LLM."""
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    self.api_url,
-                    json={
-                        "model": "qwen3:0.6b",
-                        "prompt": f"""You are a command generator. Your task is to convert user requests into bash commands.
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
 
-IMPORTANT: Respond with ONLY a JSON object. No other text, no thoughts, no explanations.
-The response must be a valid JSON object with exactly these fields:
-- command: the bash command to execute
-- explanation: a brief explanation of what the command does
+    async def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared HTTP client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=60)
+            )
+        return self._client
 
-Example response:
-{{"command": "ls -la", "explanation": "Lists all files including hidden ones with detailed information"}}
+    async def aclose(self) -> None:
+        """Close the shared HTTP client and release pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
-User request: {prompt}
+    async def __aenter__(self) -> "LLMClient":
+        return self
 
-Response:""",
-                        "stream": False
-                    },
-                    timeout=30.0
-                )
-                
-                if response.status_code != 200:
-                    return {
-                        "error": f"LLM API error: {response.status_code}",
-                        "details": response.text
-                    }
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+        
+    async def generate_command(self, prompt: str) -> Dict[str, Any]:
+        """Generate a command based on the user's prompt using the local LLM."""
+        try:
+            client = await self._get_client()
+            response = await client.post(
+                self.api_url,
+                content=orjson.dumps({**_PAYLOAD_MODEL, "prompt": _PROMPT_TEMPLATE.format(prompt=prompt)}),
+                headers={"Content-Type": "application/json"},
+                timeout=self.timeout
+            )
+            
+            if response.status_code != 200:
+                return {
+                    "error": f"LLM API error: {response.status_code}",
+                    "details": response.text
+                }
+            
+            result = orjson.loads(response.content)
+            response_text = result.get("response", "").strip()
+            
+            # Extract JSON part from the response
+            # Look for the last occurrence of a JSON object in the text
+            json_text = _extract_json_object(response_text)
+            if json_text is None:
+                return {
+                    "error": "No JSON object found in response",
+                    "details": {"response": response_text}
+                }
+            response_text = json_text
+            
+            try:
+                command_data = orjson.loads(response_text)
                 
-                result = response.json()
-                response_text = result.get("response", "").strip()
+                command = command_data.get("command", "").strip()
+                explanation = command_data.get("explanation", "").strip()
                 
-                # Debug logging
-                print("\n=== LLM Response ===")
-                print(f"Raw response: {response_text}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("LLM response: %s", result.get("response", ""))
+                    logger.debug("Extracted command: %s (%s)", command, explanation)
                 
-                try:
-                    # Try to parse the response as JSON
-                    response_text = response_text.strip()
-                    
-                    # Extract JSON part from the response
-                    # Look for the last occurrence of a JSON object in the text
-                    json_start = response_text.rfind('{')
-                    json_end = response_text.rfind('}') + 1
-                    
-                    if json_start >= 0 and json_end > json_start:
-                        response_text = response_text[json_start:json_end]
-                    else:
-                        return {
-                            "error": "No JSON object found in response",
-                            "details": {"response": response_text}
-                        }
-                    
-                    # Debug logging
-                    print(f"\nExtracted JSON: {response_text}")
-                    
-                    command_data = json.loads(response_text)
-                    
-                    # Debug logging
-                    print(f"\nParsed JSON: {command_data}")
-                    
-                    command = command_data.get("command", "").strip()
-                    explanation = command_data.get("explanation", "").strip()
-                    
-                    # Debug logging
-                    print(f"\nExtracted command: {command}")
-                    print(f"Extracted explanation: {explanation}")
-                    
-                    if not command:
-                        return {
-                            "error": "No command found in response",
-                            "details": {"response": response_text}
-                        }
-                    
-                    return {
-                        "command": command,
-                        "explanation": explanation,
-                        "raw_response": result
-                    }
-                except json.JSONDecodeError:
-                    # If not JSON, try to extract just the command
-                    # Look for lines that might contain the command
-                    lines = response_text.split('\n')
-                    for line in lines:
-                        line = line.strip()
-                        if line and not line.startswith(('{', '[', '<', 'think', 'Thought', 'Okay', 'Let', 'I', 'The')):
-                            return {
-                                "command": line,
-                                "explanation": "Command extracted from response",
-                                "raw_response": result
-                            }
-                    
+                if not command:
                     return {
-                        "error": "Could not extract command from response",
+                        "error": "No command found in response",
                         "details": {"response": response_text}
                     }
                 
+                return {
+                    "command": command,
+                    "explanation": explanation,
+                    "raw_response": result
+                }
+            except orjson.JSONDecodeError:
+                # If not JSON, try to extract just the command
+                # Look for lines that might contain the command
+                lines = response_text.split('\n')
+                for line in lines:
+                    line = line.strip()
+                    if line and not line.startswith(('{', '[', '<', 'think', 'Thought', 'Okay', 'Let', 'I', 'The')):
+                        return {
+                            "command": line,
+                            "explanation": "Command extracted from response",
+                            "raw_response": result
+                        }
+                
+                return {
+                    "error": "Could not extract command from response",
+                    "details": {"response": response_text}
+                }
+            
         except Exception as e:
             return {
                 "error": f"Failed to generate command: {str(e)}",
                 "details": {"prompt": prompt}
             }
 
-class MCPClient:
-    def __init__(self, server_url: str = MCP_SERVER_URL):
-        self.server_url = server_url
-        
-    async def execute_command(self, command: str, purpose: str) -> Dict[str, Any]:
-        """Execute a command through the MCP server."""
-        try:
-            # Print request for debugging
-            print(f"Sending request to MCP: {{'command': '{command}', 'context': {{'purpose': '{purpose}'}}}}")
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.server_url}/execute",
-                    json={
-                        "command": command,
-                        "context": {
-                            "purpose": purpose
-                        }
-                    },
-                    timeout=30.0
-                )
-                
-                # Print response for debugging
-                print(f"MCP response status: {response.status_code}")
-                print(f"MCP response body: {response.text}")
-                
-                if response.status_code != 200:
-                    return {
-                        "error": f"Server error: {response.status_code}",
-                        "details": response.text
-                    }
-                
-                return response.json()
-                
-        except Exception as e:
-            return {
-                "error": f"Failed to execute command: {str(e)}",
-                "details": {"command": command}
-            }
+# Static WebSocket frames, encoded once
+_STATUS_GENERATING = orjson.dumps({"status": "Generating command..."}).decode()
+_ERROR_NO_PROMPT = orjson.dumps({"error": "No prompt provided"}).decode()
 
-# Initialize clients
-llm_client = LLMClient()
-mcp_client = MCPClient()
+async def _send_json(websocket: WebSocket, data: Dict[str, Any]) -> None:
+    # Encode with orjson but send a text frame, as the page JSON.parses event.data
+    await websocket.send_text(orjson.dumps(data).decode())
 
 @app.get("/", response_class=HTMLResponse)
 async def root(request: Request):
@@ -190,29 +202,28 @@ async def root(request: Request):
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
+    llm_client = websocket.app.state.llm_client
+    mcp_client = websocket.app.state.mcp_client
+    # Each connection gets its own MCP session; the client and its pool are shared
+    session_id = uuid.uuid4().hex
     
     try:
         while True:
             # Receive prompt from client
-            data = await websocket.receive_json()
+            data = orjson.loads(await websocket.receive_text())
             prompt = data.get("prompt", "")
             
             if not prompt:
-                await websocket.send_json({
-                    "error": "No prompt provided"
-                })
+                await websocket.send_text(_ERROR_NO_PROMPT)
                 continue
             
             # Generate command using LLM
-            await websocket.send_json({
-                "status": "Generating command...",
-                "prompt": prompt
-            })
+            await websocket.send_text(_STATUS_GENERATING)
             
             llm_result = await llm_client.generate_command(prompt)
             
             if "error" in llm_result:
-                await websocket.send_json({
+                await _send_json(websocket, {
                     "error": llm_result["error"],
                     "details": llm_result.get("details", {})
                 })
@@ -221,29 +232,23 @@ async def websocket_endpoint(websocket: WebSocket):
             command = llm_result["command"]
             explanation = llm_result.get("explanation", "")
             
-            # Send the generated command to client
-            await websocket.send_json({
-                "status": "Command generated",
+            # Send the generated command to client and execute it
+            await _send_json(websocket, {
+                "status": "Executing command...",
                 "command": command,
                 "explanation": explanation
             })
             
-            # Execute the command
-            await websocket.send_json({
-                "status": "Executing command...",
-                "command": command
-            })
-            
-            result = await mcp_client.execute_command(command, prompt)
+            result = await mcp_client.execute_command(command, prompt, session_id=session_id)
             
             # Send the result back to client
-            await websocket.send_json({
+            await _send_json(websocket, {
                 "status": "Command executed",
                 "result": result
             })
             
     except Exception as e:
-        await websocket.send_json({
+        await _send_json(websocket, {
             "error": f"WebSocket error: {str(e)}"
         })
     finally:
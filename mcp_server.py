@@ -1,26 +1,72 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 import httpx
 import json
+import orjson
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from pydantic import BaseModel
+from starlette.background import BackgroundTask
 from typing import Optional
 from action_logger import ActionLogger
 
-app = FastAPI(title="MCP Server")
-logger = ActionLogger()
-
 # Configuration
 SANDBOX_URL = "http://localhost:8000"
+MAX_SESSIONS = 1024  # least recently used sessions are evicted beyond this
+
+# Accumulated context per client session_id
+sessions: "OrderedDict[str, dict]" = OrderedDict()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled client per process, bound to the running event loop
+    app.state.http = httpx.AsyncClient(
+        timeout=30.0,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=60)
+    )
+    try:
+        yield
+    finally:
+        await app.state.http.aclose()
+
+app = FastAPI(title="MCP Server", lifespan=lifespan, default_response_class=ORJSONResponse)
+logger = ActionLogger()
+
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    return request.app.state.http
 
 class CommandRequest(BaseModel):
     command: str
     context: Optional[dict] = None
 
+def update_session_context(context: Optional[dict]) -> Optional[dict]:
+    """Merge a request's context into the stored context for its session.
+
+    Returns a copy of the merged session context, or the request's own
+    context when it carries no session_id.
+    """
+    session_id = context.get("session_id") if context else None
+    if not session_id:
+        return context
+    session = sessions.pop(session_id, {})
+    session.update(context)
+    sessions[session_id] = session
+    while len(sessions) > MAX_SESSIONS:
+        sessions.popitem(last=False)
+    return dict(session)
+
+def attach_context(body: bytes, context: dict) -> bytes:
+    """Append a "context" field to an encoded JSON object without re-encoding it."""
+    body = body.rstrip()
+    separator = b"," if body[:-1].rstrip() != b"{" else b""
+    return body[:-1] + separator + b'"context":' + orjson.dumps(context) + b"}"
+
 @app.get("/")
 def root():
     return {"status": "MCP server ready"}
 
 @app.post("/execute")
-async def execute_command(request: CommandRequest):
+async def execute_command(request: CommandRequest, client: httpx.AsyncClient = Depends(get_http_client)):
     try:
         # Log the start of command execution from UI
         logger.log_action(
@@ -30,50 +76,54 @@ async def execute_command(request: CommandRequest):
             context=request.context if request.context else {}
         )
 
+        session_context = update_session_context(request.context)
+
         # Forward the command to the bash sandbox
-        async with httpx.AsyncClient() as client:
-            # Print request for debugging
-            print(f"Sending request to sandbox: {{'command': '{request.command}'}}")
-            
-            response = await client.post(
-                f"{SANDBOX_URL}/run",
-                json={"command": request.command},
-                headers={"Content-Type": "application/json"}
-            )
-            
-            # Print response for debugging
-            print(f"Sandbox response status: {response.status_code}")
-            print(f"Sandbox response body: {response.text}")
-            
-            if response.status_code != 200:
-                error_msg = f"Sandbox error: {response.text}"
-                # Log the error
-                logger.log_action(
-                    action_type="ui_command_execution_error",
-                    command=request.command,
-                    status="error",
-                    error=error_msg,
-                    context=request.context if request.context else {}
-                )
-                raise HTTPException(status_code=response.status_code, detail=error_msg)
-            
-            result = response.json()
-            
-            # Add context to the response if provided
-            if request.context:
-                result["context"] = request.context
-
-            # Log successful execution
+        # Print request for debugging
+        print(f"Sending request to sandbox: {{'command': '{request.command}'}}")
+        
+        response = await client.post(
+            f"{SANDBOX_URL}/run",
+            content=orjson.dumps({"command": request.command}),
+            headers={"Content-Type": "application/json"}
+        )
+        
+        # Print response for debugging
+        print(f"Sandbox response status: {response.status_code}")
+        
+        if response.status_code != 200:
+            error_msg = f"Sandbox error: {response.text}"
+            # Log the error
             logger.log_action(
-                action_type="ui_command_execution_success",
+                action_type="ui_command_execution_error",
                 command=request.command,
-                status="success",
-                output=result.get("output", ""),
+                status="error",
+                error=error_msg,
                 context=request.context if request.context else {}
             )
-                
-            return result
-            
+            raise HTTPException(status_code=response.status_code, detail=error_msg)
+        
+        result = orjson.loads(response.content)
+
+        # Log successful execution
+        logger.log_action(
+            action_type="ui_command_execution_success",
+            command=request.command,
+            status="success",
+            output=result.get("output", ""),
+            context=request.context if request.context else {}
+        )
+        
+        # Forward the sandbox body without re-encoding it, splicing in the
+        # session context when there is one
+        body = response.content
+        if session_context:
+            if "context" in result:
+                result["context"] = session_context
+                return result
+            body = attach_context(body, session_context)
+        return Response(content=body, media_type=response.headers.get("content-type", "application/json"))
+        
     except httpx.RequestError as e:
         error_msg = f"Failed to communicate with sandbox: {str(e)}"
         # Log the error
@@ -86,6 +136,42 @@ async def execute_command(request: CommandRequest):
         )
         raise HTTPException(status_code=500, detail=error_msg)
 
+@app.post("/execute_stream")
+async def execute_command_stream(request: CommandRequest, client: httpx.AsyncClient = Depends(get_http_client)):
+    # Log the start of streamed command execution from UI
+    logger.log_action(
+        action_type="ui_command_stream_start",
+        command=request.command,
+        reasoning="Streamed command received from UI interface",
+        context=request.context if request.context else {}
+    )
+
+    update_session_context(request.context)
+
+    # Forward the command to the sandbox and relay its output as it arrives
+    try:
+        response = await client.send(
+            client.build_request("POST", f"{SANDBOX_URL}/run_stream", json={"command": request.command}),
+            stream=True
+        )
+    except httpx.RequestError as e:
+        error_msg = f"Failed to communicate with sandbox: {str(e)}"
+        logger.log_action(
+            action_type="ui_command_execution_error",
+            command=request.command,
+            status="error",
+            error=error_msg,
+            context=request.context if request.context else {}
+        )
+        raise HTTPException(status_code=500, detail=error_msg)
+
+    return StreamingResponse(
+        response.aiter_raw(),
+        status_code=response.status_code,
+        media_type=response.headers.get("content-type"),
+        background=BackgroundTask(response.aclose)
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8002) 
\ No newline at end of file
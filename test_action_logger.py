@@ -0,0 +1,155 @@
+import gzip
+import json
+import threading
+import zlib
+from datetime import datetime
+
+import pytest
+
+import action_logger
+from action_logger import ActionLogger, _format_timestamp
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / "actions.jsonl")
+
+def read_records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+def test_flush_writes_queued_actions_as_json_lines(log_path):
+    logger = ActionLogger(log_path)
+    logger.log_action("test", "ls", output="a.txt")
+    logger.log_action("test", "pwd", status="error", error="boom")
+    logger.flush()
+
+    records = read_records(log_path)
+    assert [r["command"] for r in records] == ["ls", "pwd"]
+    assert records[0]["output"] == "a.txt"
+    assert records[1]["error"] == "boom"
+    logger.close()
+
+def test_close_drains_queue_and_appends_across_instances(log_path):
+    first = ActionLogger(log_path)
+    first.log_action("test", "ls")
+    first.close()
+
+    second = ActionLogger(log_path)
+    second.log_action("test", "pwd")
+    second.close()
+
+    assert [r["command"] for r in read_records(log_path)] == ["ls", "pwd"]
+
+def test_clear_logs_truncates_file_and_recent_actions(log_path):
+    logger = ActionLogger(log_path)
+    logger.log_action("test", "ls")
+    assert logger.clear_logs()
+    logger.log_action("test", "pwd")
+    logger.close()
+
+    assert [r["command"] for r in read_records(log_path)] == ["pwd"]
+    assert [a["command"] for a in logger.get_recent_actions()] == ["pwd"]
+
+def test_unserializable_record_does_not_stop_writer(log_path):
+    logger = ActionLogger(log_path)
+    cyclic = {}
+    cyclic["self"] = cyclic
+    logger.log_action("test", "bad", details=cyclic)
+    logger.log_action("test", "when", details={"at": datetime(2025, 1, 2, 3, 4, 5)})
+    logger.log_action("test", "ls")
+    logger.close()
+
+    assert logger.failed == 1
+    records = read_records(log_path)
+    assert [r["command"] for r in records] == ["when", "ls"]
+    assert records[0]["details"]["at"] == "2025-01-02 03:04:05"
+
+def test_gz_log_is_compressed_json_lines(tmp_path):
+    path = str(tmp_path / "actions.jsonl.gz")
+    logger = ActionLogger(path)
+    logger.log_action("test", "ls")
+    logger.flush()
+
+    # Recoverable up to the last flush while the file is still open
+    with open(path, "rb") as f:
+        partial = zlib.decompressobj(31).decompress(f.read())
+    assert json.loads(partial)["command"] == "ls"
+
+    assert logger.clear_logs()
+    logger.log_action("test", "pwd")
+    logger.close()
+
+    with gzip.open(path, "rt") as f:
+        assert [json.loads(line)["command"] for line in f] == ["pwd"]
+
+class StalledFile:
+    """Wrap a log handle so writes block until released."""
+    def __init__(self, fh):
+        self._fh = fh
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def write(self, data):
+        self.entered.set()
+        self.release.wait()
+        return self._fh.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self._fh, name)
+
+def test_stalled_writer_keeps_clear_and_close_from_touching_the_log(log_path, monkeypatch):
+    monkeypatch.setattr(action_logger, "LOG_QUEUE_SIZE", 2)
+    monkeypatch.setattr(action_logger, "CONTROL_PUT_TIMEOUT", 0.05)
+    logger = ActionLogger(log_path, flush_interval=0)
+    stalled = logger._fh = StalledFile(logger._fh)
+
+    logger.log_action("test", "ls")
+    assert stalled.entered.wait(1)
+    for command in ("pwd", "whoami", "date"):
+        logger.log_action("test", command)
+    assert logger.dropped == 1
+
+    assert not logger.clear_logs()
+    assert len(logger.get_recent_actions()) == 4
+
+    logger.close()
+    assert logger.dropped == 3
+    assert not logger._fh.closed
+
+    stalled.release.set()
+    logger.close()
+    assert logger._fh.closed
+    assert [r["command"] for r in read_records(log_path)] == ["ls", "pwd", "whoami"]
+
+@pytest.mark.parametrize("t", [
+    1700000000.0,
+    1700000000.958,   # float error once truncated this to .957
+    1700000000.9999996,  # rounds up into the next second
+    1700000001.5,     # same second as the previous value, from the cache
+    1700003600.001,
+])
+def test_format_timestamp_matches_isoformat(t):
+    assert _format_timestamp(t) == datetime.fromtimestamp(t).isoformat(timespec="milliseconds")
+
+def test_recent_actions_are_bounded(log_path):
+    logger = ActionLogger(log_path, max_recent=3)
+    for i in range(5):
+        logger.log_action("test", f"echo {i}")
+    logger.close()
+
+    assert [a["command"] for a in logger.get_recent_actions()] == ["echo 2", "echo 3", "echo 4"]
+    assert [a["command"] for a in logger.get_recent_actions(2)] == ["echo 3", "echo 4"]
+    assert logger.get_recent_actions(0) == []
+    assert logger.get_recent_actions(-1) == []
+    assert len(read_records(log_path)) == 5
+
+@pytest.mark.parametrize("value, expected", [
+    ("5", 5),
+    ("-1", 0),
+    ("lots", action_logger.DEFAULT_MAX_RECENT),
+])
+def test_max_recent_from_env(log_path, monkeypatch, value, expected):
+    monkeypatch.setenv("LLM_LOG_RECENT", value)
+    logger = ActionLogger(log_path)
+    logger.close()
+    assert logger.actions.maxlen == expected
@@ -0,0 +1,99 @@
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from fastapi import HTTPException
+
+import api
+from api import CommandRequest
+
+def group_alive(pgid):
+    """Return True while any non-zombie process is left in the process group."""
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # Fields after the parenthesised command name: state, ppid, pgrp, ...
+        state, _, pgrp = stat.rsplit(")", 1)[1].split()[:3]
+        if int(pgrp) == pgid and state != "Z":
+            return True
+    return False
+
+def wait_for_group_exit(pgid, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while group_alive(pgid):
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+@pytest.fixture
+def spawned(monkeypatch):
+    """Record every process spawned by the sandbox."""
+    procs = []
+    spawn = api._spawn
+
+    async def recording_spawn(command):
+        proc = await spawn(command)
+        procs.append(proc)
+        return proc
+
+    monkeypatch.setattr(api, "_spawn", recording_spawn)
+    return procs
+
+def test_run_timeout_kills_process_group(monkeypatch, spawned):
+    monkeypatch.setattr(api, "COMMAND_TIMEOUT", 0.5)
+
+    start = time.monotonic()
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(api.run_bash(CommandRequest(command="sleep 20 | cat")))
+
+    assert exc_info.value.status_code == 408
+    assert time.monotonic() - start < 5
+    assert wait_for_group_exit(spawned[0].pid)
+
+def test_run_truncates_output_past_limit(monkeypatch):
+    monkeypatch.setattr(api, "MAX_OUTPUT", 1000)
+
+    exact = asyncio.run(api.run_bash(CommandRequest(command="head -c 1000 /dev/zero")))
+    assert exact["output"] == "\0" * 1000
+
+    result = asyncio.run(api.run_bash(CommandRequest(command="head -c 200000 /dev/zero")))
+    assert result["output"] == "\0" * 1000 + api.TRUNCATED_MARKER.decode()
+
+async def read_stream(command):
+    response = await api.run_bash_stream(CommandRequest(command=command))
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+def test_run_stream_ends_with_returncode():
+    body = asyncio.run(read_stream("echo hi; exit 3"))
+    output, trailer = body.rstrip(b"\n").rsplit(b"\n", 1)
+    assert output == b"hi\n"
+    assert json.loads(trailer) == {"returncode": 3}
+
+def test_run_stream_timeout_ends_with_error(monkeypatch, spawned):
+    monkeypatch.setattr(api, "COMMAND_TIMEOUT", 0.5)
+
+    body = asyncio.run(read_stream("echo start; sleep 20"))
+    assert body.startswith(b"start\n")
+    assert json.loads(body.rstrip(b"\n").rsplit(b"\n", 1)[1]) == {"error": "command timeout"}
+    assert wait_for_group_exit(spawned[0].pid)
+
+def test_run_stream_aclose_kills_process_group():
+    async def read_first_chunk_then_disconnect():
+        response = await api.run_bash_stream(CommandRequest(command="echo $$; sleep 30"))
+        first = await response.body_iterator.__anext__()
+        await response.body_iterator.aclose()
+        return int(first)
+
+    pgid = asyncio.run(read_first_chunk_then_disconnect())
+    assert wait_for_group_exit(pgid)
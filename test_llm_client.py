@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from llm_client import MCPClient, MCPError, _DANGEROUS_RE
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # MCPClient opens its ActionLogger in the working directory
+    monkeypatch.chdir(tmp_path)
+    client = MCPClient()
+    yield client
+    client.logger.close()
+
+@pytest.mark.parametrize("command", [
+    "ls -la",
+    "git add .",
+    "echo address",
+    "cat README.md",
+])
+def test_safe_commands_pass_validation(client, command):
+    assert _DANGEROUS_RE.search(command) is None
+    client._validate_command(command)
+
+@pytest.mark.parametrize("command", [
+    "rm -rf /",
+    "RM  -RF /tmp/x",
+    "mkfs.ext4 /dev/sda1",
+    "dd if=/dev/zero of=/dev/sda",
+    "/bin/dd if=/dev/zero of=/dev/sda",
+    ":(){ :|:& };:",
+])
+def test_dangerous_commands_are_rejected(client, command):
+    with pytest.raises(MCPError):
+        client._validate_command(command)
+
+def test_cooldown_spaces_out_concurrent_callers(client):
+    client.command_cooldown = 0.05
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        releases = []
+
+        async def one():
+            await client._check_command_cooldown()
+            releases.append(loop.time() - start)
+
+        await asyncio.gather(*(one() for _ in range(4)))
+        return sorted(releases)
+
+    releases = asyncio.run(run())
+    gaps = [b - a for a, b in zip(releases, releases[1:])]
+    assert releases[0] < 0.04
+    assert all(gap >= 0.04 for gap in gaps)
+
+@pytest.mark.parametrize("attempt", [0, 1, 2, 5, 10, 50])
+def test_backoff_is_jittered_and_capped(attempt):
+    ceiling = min(30.0, 0.25 * 2 ** attempt)
+    delays = [MCPClient._backoff(attempt) for _ in range(200)]
+    assert all(ceiling / 2 <= delay <= ceiling for delay in delays)
+    assert len(set(delays)) > 1
@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+pytest.importorskip("orjson")
+
+@pytest.fixture(scope="module")
+def llm_ui(tmp_path_factory):
+    # llm_ui creates its templates/static directories in the working directory
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("llm_ui"))
+    try:
+        import llm_ui
+    finally:
+        os.chdir(cwd)
+    return llm_ui
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"command": "ls", "explanation": "list"}', '{"command": "ls", "explanation": "list"}'),
+    ('Sure:\n{"command": "pwd"}\nDone.', '{"command": "pwd"}'),
+    ('<think>{"command": "rm x"}</think>\n{"command": "ls"}', '{"command": "ls"}'),
+    ('{"command": "awk \'{print $1}\' f.txt"}', '{"command": "awk \'{print $1}\' f.txt"}'),
+    ('{"command": "ls", "meta": {"safe": true}}', '{"command": "ls", "meta": {"safe": true}}'),
+    ('{not json}', '{not json}'),
+])
+def test_extract_json_object_finds_last_object(llm_ui, text, expected):
+    assert llm_ui._extract_json_object(text) == expected
+
+@pytest.mark.parametrize("text", [
+    "",
+    "ls -la",
+    "} then {",
+    "{ never closed",
+    "never opened }",
+])
+def test_extract_json_object_without_object(llm_ui, text):
+    assert llm_ui._extract_json_object(text) is None
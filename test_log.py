@@ -2,9 +2,6 @@ import asyncio
 from llm_client import MCPClient
 
 async def main():
-    # Create MCP client
-    client = MCPClient()
-    
     # Run a simple command
     command = "pwd"
     purpose = "Show current working directory"
@@ -12,7 +9,8 @@ async def main():
     print(f"\nExecuting command: {command}")
     print(f"Purpose: {purpose}")
     
-    result = await client.execute_command(command, purpose)
+    async with MCPClient() as client:
+        result = await client.execute_command(command, purpose)
     
     if "error" in result:
         print(f"Error Type: {result.get('error_type', 'unknown')}")
@@ -0,0 +1,58 @@
+import json
+import os
+from collections import OrderedDict
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+pytest.importorskip("orjson")
+
+@pytest.fixture(scope="module")
+def mcp_server(tmp_path_factory):
+    # mcp_server opens its ActionLogger in the working directory on import
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("mcp_server"))
+    try:
+        import mcp_server
+    finally:
+        os.chdir(cwd)
+    return mcp_server
+
+@pytest.fixture
+def sessions(mcp_server, monkeypatch):
+    sessions = OrderedDict()
+    monkeypatch.setattr(mcp_server, "sessions", sessions)
+    monkeypatch.setattr(mcp_server, "MAX_SESSIONS", 2)
+    return sessions
+
+def test_context_without_session_id_is_not_stored(mcp_server, sessions):
+    assert mcp_server.update_session_context({"purpose": "ls"}) == {"purpose": "ls"}
+    assert mcp_server.update_session_context(None) is None
+    assert not sessions
+
+def test_session_context_accumulates(mcp_server, sessions):
+    mcp_server.update_session_context({"session_id": "a", "purpose": "list", "cwd": "/tmp"})
+    merged = mcp_server.update_session_context({"session_id": "a", "purpose": "count"})
+
+    assert merged == {"session_id": "a", "purpose": "count", "cwd": "/tmp"}
+    merged["cwd"] = "/"
+    assert sessions["a"]["cwd"] == "/tmp"
+
+def test_least_recently_used_session_is_evicted(mcp_server, sessions):
+    for session_id in ("a", "b"):
+        mcp_server.update_session_context({"session_id": session_id})
+    mcp_server.update_session_context({"session_id": "a", "purpose": "again"})
+    mcp_server.update_session_context({"session_id": "c"})
+
+    assert list(sessions) == ["a", "c"]
+
+@pytest.mark.parametrize("body, expected", [
+    (b'{"output":"hi\\n"}', {"output": "hi\n", "context": {"session_id": "a"}}),
+    (b'{"output": "}"}\n', {"output": "}", "context": {"session_id": "a"}}),
+    (b"{}", {"context": {"session_id": "a"}}),
+    (b"{ }  ", {"context": {"session_id": "a"}}),
+])
+def test_attach_context_splices_into_object(mcp_server, body, expected):
+    attached = mcp_server.attach_context(body, {"session_id": "a"})
+    assert json.loads(attached) == expected